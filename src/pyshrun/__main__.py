@@ -1,20 +1,22 @@
+import functools
+import shutil
 import sys
 from contextlib import suppress
-from importlib.metadata import version
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, NamedTuple
 
 from colorama import Fore, Style
-from platformdirs import user_config_dir
-from pydantic import BaseModel
 
 from . import sh
-from .parser import ConfigParser, RunConfig
+
+# Heavy dependencies (yaml, platformdirs) are imported lazily in the
+# functions that need them to keep the startup of the `run` command fast.
+if TYPE_CHECKING:
+    from .parser import RunConfig
 
 PROJECT_NAME = "py-shell-runner"
-VERSION = version(PROJECT_NAME)
 RUN_CONFIG_FILE_NAME = "run.yml"
-THIS_DIR = Path(__file__).parent
-EXAMPLE_FILE = THIS_DIR / "run-example.yml"
+EDITORS = ("nvim", "vim", "nano")  # In the order of preference.
 
 # -----------------------------------------------------------------------------
 # Main Function
@@ -30,22 +32,21 @@ def print_usage() -> None:
         CmdOption(short="-e", long="--edit", desc="Edit the system level run.yml file"),
         CmdOption(short="", long="--update", desc="Update the package"),
     ]
-    print("py-shell-runner", VERSION)
+    print(PROJECT_NAME, _version())
     print(f"{Fore.GREEN}Usage:{Style.RESET_ALL} run [options] <command>\n")
 
     print(f"{Fore.GREEN}Options:{Style.RESET_ALL}")
-    max_opt_len = max(len(option.long) for option in psh_options)
+    width = max(len(option.long) for option in psh_options)
+    blue, reset = Fore.BLUE, Style.RESET_ALL
     for option in psh_options:
         if option.short:
-            print(f"  {Fore.BLUE}{option.short.ljust(2)}{Style.RESET_ALL}, ", end="")
+            print(f"  {blue}{option.short:<2}{reset}, ", end="")
         else:
             print(" " * 6, end="")
-        print(
-            f"{Fore.BLUE}{option.long.ljust(max_opt_len)}{Style.RESET_ALL} {option.desc}"
-        )
+        print(f"{blue}{option.long:<{width}}{reset} {option.desc}")
     print()
 
-    config: RunConfig = _load_config()
+    config: "RunConfig" = _load_config()
     config.reg.print_usage()
 
 
@@ -58,29 +59,13 @@ def main() -> None:
         return
 
     # psh specific command
-    match args[0]:
-        case "-h" | "--help":
-            print_usage()
-            return
-
-        case "-v" | "--version":
-            print(VERSION)
-            return
-
-        case "-i" | "--init":
-            _run_init()
-            return
-
-        case "-e" | "--edit":
-            _run_edit()
-            return
-
-        case "--update":
-            _self_update()
-            return
+    handler = _DISPATCH.get(args[0])
+    if handler is not None:
+        handler()
+        return
 
     # Custom user command
-    config: RunConfig = _load_config()
+    config: "RunConfig" = _load_config()
     config.execute(args)
 
 
@@ -89,7 +74,15 @@ def main() -> None:
 # -----------------------------------------------------------------------------
 
 
-class CmdOption(BaseModel):
+@functools.cache
+def _version() -> str:
+    """Get the installed version of the package."""
+    from importlib.metadata import version
+
+    return version(PROJECT_NAME)
+
+
+class CmdOption(NamedTuple):
     """Command-line argument model."""
 
     short: str = ""
@@ -97,13 +90,21 @@ class CmdOption(BaseModel):
     desc: str = ""
 
 
+def _print_version() -> None:
+    print(_version())
+
+
+@functools.cache
+def _example_file() -> Path:
+    """Get the path of the example config shipped with the package."""
+    return Path(__file__).parent / "run-example.yml"
+
+
 def _generate_config_file(path: Path) -> None:
     if path.exists():
         print(f"{Fore.YELLOW}Configuration file already exists: {RUN_CONFIG_FILE_NAME}")
         return
-    with open(EXAMPLE_FILE, "r") as example_file:
-        with open(path, "w") as out_file:
-            out_file.write(example_file.read())
+    shutil.copyfile(_example_file(), path)
     print(f"{Fore.GREEN}Configuration file generated at {path}")
 
 
@@ -115,13 +116,8 @@ def _run_init() -> None:
 def _run_edit() -> None:
     editor = sh.get_env("EDITOR")
     if editor is None:
-        if sh.which("vim"):
-            editor = "vim"
-        if sh.which("nvim"):
-            editor = "nvim"
-        elif sh.which("nano"):
-            editor = "nano"
-        else:
+        editor = next((e for e in EDITORS if sh.which(e)), None)
+        if editor is None:
             print(
                 f"{Fore.RED}No editor found. Please set the EDITOR environment variable."
             )
@@ -134,12 +130,21 @@ def _run_edit() -> None:
 
 def _system_config_path() -> Path:
     """Get the system-wide configuration file path."""
+    from platformdirs import user_config_dir
+
     return (
         Path(user_config_dir(PROJECT_NAME, ensure_exists=True)) / RUN_CONFIG_FILE_NAME
     )
 
 
-def _load_config() -> RunConfig:
+def _cache_dir() -> Path:
+    """Get the directory where parsed configurations are cached."""
+    from platformdirs import user_cache_dir
+
+    return Path(user_cache_dir(PROJECT_NAME))
+
+
+def _load_config() -> "RunConfig":
     """Load the configuration from the specified YAML files."""
     system_config = _load_system_config()
     local_config = _load_local_config()
@@ -157,20 +162,24 @@ def _load_config() -> RunConfig:
     exit(1)
 
 
-def _load_local_config() -> RunConfig | None:
+def _load_local_config() -> "RunConfig | None":
     """Load the local configuration from the project directory."""
+    from .parser import ConfigParser
+
     config_file_path = Path(RUN_CONFIG_FILE_NAME)
     if not config_file_path.exists():
         return None
-    return ConfigParser(config_file_path).parse()
+    return ConfigParser(config_file_path, cache_dir=_cache_dir()).parse()
 
 
-def _load_system_config() -> RunConfig | None:
+def _load_system_config() -> "RunConfig | None":
     """Load the system-wide configuration."""
+    from .parser import ConfigParser
+
     config_file_path = _system_config_path()
     if not config_file_path.exists():
         return None
-    return ConfigParser(config_file_path).parse()
+    return ConfigParser(config_file_path, cache_dir=_cache_dir()).parse()
 
 
 def _self_update() -> None:
@@ -197,6 +206,19 @@ def _self_update() -> None:
     sh.cmd(f"pip install --no-cache-dir --upgrade {PROJECT_NAME}", throw=True)
 
 
+_DISPATCH: dict[str, Callable[[], None]] = {
+    "-h": print_usage,
+    "--help": print_usage,
+    "-v": _print_version,
+    "--version": _print_version,
+    "-i": _run_init,
+    "--init": _run_init,
+    "-e": _run_edit,
+    "--edit": _run_edit,
+    "--update": _self_update,
+}
+
+
 # -----------------------------------------------------------------------------
 # Entrypoint
 # -----------------------------------------------------------------------------
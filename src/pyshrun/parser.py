@@ -1,62 +1,124 @@
+import json
+import zlib
+from contextlib import suppress
 from pathlib import Path
-from typing import TypeAlias
+from typing import Any, TypeAlias
 
-import yaml
 from colorama import Fore
 
 from .types import *
 
 CommandData: TypeAlias = str | list | dict
 
+# Key sets of the single key config commands.
+_THROW_KEYS = frozenset({"throw"})
+_DESC_KEYS = frozenset({"desc"})
+
 
 class ConfigParser:
 
-    def __init__(self, file_path: Path) -> None:
+    def __init__(self, file_path: Path, cache_dir: Path | None = None) -> None:
         self.file_path = file_path
+        self.cache_dir = cache_dir
+        self._stat = file_path.stat()
 
     def parse(self) -> RunConfig:
         config = RunConfig()
-        with open(self.file_path, "r") as file:
-            config_data = yaml.safe_load(file)
-            if not isinstance(config_data, dict):
-                print(f"{Fore.RED}Invalid configuration expected a dict")
-                exit(1)
-            if "commands" not in config_data:
-                print(f"{Fore.RED}Missing 'commands' key in configuration")
-                exit(1)
-            for cmd_name, cmd_data in config_data["commands"].items():
-                cmd = self._parse_command(cmd_data)
-                config.reg.commands[cmd_name] = cmd
+        config_data = self._load_data()
+        if not isinstance(config_data, dict):
+            print(f"{Fore.RED}Invalid configuration expected a dict")
+            exit(1)
+        if "commands" not in config_data:
+            print(f"{Fore.RED}Missing 'commands' key in configuration")
+            exit(1)
+        # Commands are parsed when they're used, a typical invocation only
+        # needs one of them.
+        for cmd_name, cmd_data in config_data["commands"].items():
+            config.reg.commands[cmd_name] = LazyCommand(cmd_data, self._parse_command)
         return config
 
+    def _load_data(self) -> Any:
+        """Load the raw config data, preferring the JSON sidecar when it's fresh.
+
+        The sidecar holds the same data as the YAML file but loads much faster,
+        and since commands are parsed lazily that's all a warm run needs.
+        """
+        sidecar_path = self._sidecar_path()
+        if sidecar_path is not None and sidecar_path.exists():
+            with suppress(Exception):
+                sidecar = json.loads(sidecar_path.read_bytes())
+                if (
+                    sidecar["path"] == str(self.file_path.absolute())
+                    and sidecar["mtime_ns"] == self._stat.st_mtime_ns
+                    and sidecar["size"] == self._stat.st_size
+                ):
+                    return sidecar["data"]
+
+        config_data = self._load_yaml()
+        if sidecar_path is not None:
+            self._dump_sidecar(sidecar_path, config_data)
+        return config_data
+
+    def _load_yaml(self) -> Any:
+        """Load the raw config data from the YAML file."""
+        # Imported here so that runs served from the sidecar never load yaml.
+        import yaml
+
+        # Use the libyaml backed loader when available, it's much faster.
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        with open(self.file_path, "r") as file:
+            return yaml.load(file, Loader=loader)
+
+    def _sidecar_path(self) -> Path | None:
+        """Path of the JSON sidecar for this file, or None if caching is off."""
+        if self.cache_dir is None:
+            return None
+        # crc32 is cheap and needs no OpenSSL, collisions are caught by the
+        # path stored in the sidecar.
+        key = zlib.crc32(str(self.file_path.absolute()).encode())
+        return self.cache_dir / f"data-{self.file_path.name}-{key:08x}.json"
+
+    def _dump_sidecar(self, sidecar_path: Path, config_data: Any) -> None:
+        """Best-effort write of the raw data, skipped if it's not plain JSON."""
+        with suppress(Exception):
+            sidecar = {
+                "path": str(self.file_path.absolute()),
+                "mtime_ns": self._stat.st_mtime_ns,
+                "size": self._stat.st_size,
+                "data": config_data,
+            }
+            text = json.dumps(sidecar)
+            # YAML could have dates, non string keys etc. that won't round trip.
+            if json.loads(text) != sidecar:
+                return
+            sidecar_path.parent.mkdir(parents=True, exist_ok=True)
+            sidecar_path.write_text(text)
+
     def _parse_command(self, cmd_data: CommandData) -> Command | CommandRegistry:
 
         if isinstance(cmd_data, str):
             return SimpleCommand(string=cmd_data)
 
         elif isinstance(cmd_data, list):
-            commands: list[Command] = []
-            for item in cmd_data:
-                sub_cmd = self._parse_command(item)
-                if not isinstance(sub_cmd, Command):
-                    print(f"{Fore.RED}Expected a command in list: {item}")
-                    exit(1)
-                commands.append(sub_cmd)
+            commands = [self._parse_list_item(item) for item in cmd_data]
             return ListCommands(commands=commands)
 
         elif isinstance(cmd_data, dict):
+            keys = cmd_data.keys()
+
             # Throw config
-            if "throw" in cmd_data and len(cmd_data) == 1:
+            if keys == _THROW_KEYS:
                 return ThrowConfig(throw=cmd_data["throw"])
 
             # Desc config
-            if "desc" in cmd_data and len(cmd_data) == 1:
+            if keys == _DESC_KEYS:
                 return DescConfig(desc=cmd_data["desc"])
 
             # Command object
-            if "cmd" in cmd_data:
+            if "cmd" in keys:
                 # TODO: change the keys from "cwd" to "/cwd" so the "cwd"
                 # and other commands can be a custom user command.
+                cmd_data = dict(cmd_data)  # Don't consume the raw config data.
                 desc = cmd_data.pop("desc", "")
                 ensure_env = set(cmd_data.pop("ensure_env", []))
                 set_env = dict(cmd_data.pop("set_env", {}))
@@ -80,16 +142,28 @@ class ConfigParser:
             # Command registry
             reg = CommandRegistry()
             for key, value in cmd_data.items():
-                cmd = self._parse_command(value)
                 if key == "desc":
-                    if not isinstance(cmd, SimpleCommand):
+                    if not isinstance(value, str):
                         print(f"{Fore.RED}Expected a string 'desc': {value}")
                         exit(1)
-                    reg.desc = cmd.string
+                    reg.desc = value
                 else:
-                    reg.commands[key] = cmd
+                    reg.commands[key] = LazyCommand(value, self._parse_command)
             return reg
 
+        # YAML can have other scalars (ints, null, ...) that aren't commands.
+        print(f"{Fore.RED}Invalid command: {cmd_data}")  # type: ignore[unreachable]
+        exit(1)
+
+    def _parse_list_item(self, item: CommandData) -> Command:
+        sub_cmd = self._parse_command(item)
+        # _parse_command only returns a Command or a CommandRegistry, an exact
+        # type check is enough and cheaper than isinstance(sub_cmd, Command).
+        if type(sub_cmd) is CommandRegistry:
+            print(f"{Fore.RED}Expected a command in list: {item}")
+            exit(1)
+        return sub_cmd  # type: ignore[return-value]
+
     def resolve_cwd(self, cwd: str) -> Path:
         # TODO: Document this and add test
         if cwd.strip().startswith("$THIS_DIR"):
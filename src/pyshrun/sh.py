@@ -82,6 +82,11 @@ def has_env(var_name: str) -> bool:
     return os.getenv(var_name) is not None
 
 
+def missing_envs(var_names: set[str]) -> set[str]:
+    """Get the environment variables which are not set."""
+    return var_names - os.environ.keys()
+
+
 def get_env(var_name: str) -> str | None:
     """Get the value of an environment variable."""
     return os.getenv(var_name)
@@ -89,9 +94,32 @@ def get_env(var_name: str) -> str | None:
 
 def set_env(var_name: str, value: str) -> None:
     """Set an environment variable."""
-    if has_env(var_name):
-        print(f"{Fore.YELLOW}Environment variable {var_name} already set, overwriting.")
-    os.environ[var_name] = value
+    set_envs({var_name: value})
+
+
+def set_envs(env: dict[str, str]) -> dict[str, str | None]:
+    """Set multiple environment variables and return their previous values.
+
+    Variables that weren't set before have a None value, the returned dict can
+    be passed to ``restore_envs`` to undo the changes.
+    """
+    old_env = {var_name: os.environ.get(var_name) for var_name in env}
+    for var_name, old_value in old_env.items():
+        if old_value is not None:
+            print(
+                f"{Fore.YELLOW}Environment variable {var_name} already set, overwriting."
+            )
+    os.environ.update(env)
+    return old_env
+
+
+def restore_envs(old_env: dict[str, str | None]) -> None:
+    """Restore the environment variables returned by ``set_envs``."""
+    for var_name, old_value in old_env.items():
+        if old_value is None:
+            unset_env(var_name)
+        else:
+            os.environ[var_name] = old_value
 
 
 def unset_env(var_name: str) -> None:
@@ -1,77 +1,99 @@
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Callable
 
 from colorama import Fore, Style
 
 from . import sh
 
+# Colorized templates used when listing commands, built once at import.
+_USAGE_FMT = f"  {Fore.BLUE}{{name:<{{width}}}}{Style.RESET_ALL}  {{desc}}"
+_NAME_FMT = f"{Fore.YELLOW}{{}}{Style.RESET_ALL}"
 
-@dataclass
+
+@dataclass(slots=True)
 class Command:
     desc: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ConfigCmd(Command):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class ThrowConfig(ConfigCmd):
     throw: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class DescConfig(ConfigCmd):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class CwdConfig(ConfigCmd):
-    cwd: Path = Path.cwd()
+    cwd: Path | None = None  # None is the directory run was invoked from.
 
 
-@dataclass
+@dataclass(slots=True)
 class SimpleCommand(Command):
     string: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ListCommands(Command):
     commands: list[Command] = field(default_factory=list)
 
     def __post_init__(self) -> None:
-        for cmd in self.commands:
+        for i, cmd in enumerate(self.commands):
             if isinstance(cmd, DescConfig):
                 self.desc = cmd.desc
-                self.commands.remove(cmd)
+                del self.commands[i]
                 break
 
 
-@dataclass
+@dataclass(slots=True)
+class LazyCommand:
+    """Raw config data of a command that's parsed only when it's accessed."""
+
+    data: Any
+    parse: "Callable[[Any], Command | CommandRegistry]" = field(
+        compare=False, repr=False
+    )
+
+
+@dataclass(slots=True)
 class CommandRegistry:
     desc: str = ""
-    commands: "dict[str, Command | CommandRegistry]" = field(default_factory=dict)
+    commands: "dict[str, Command | CommandRegistry | LazyCommand]" = field(
+        default_factory=dict
+    )
+
+    def get(self, cmd_name: str) -> "Command | CommandRegistry":
+        """Get a command by name, parsing and replacing it if it's lazy."""
+        cmd = self.commands[cmd_name]
+        if isinstance(cmd, LazyCommand):
+            cmd = self.commands[cmd_name] = cmd.parse(cmd.data)
+        return cmd
 
     def print_usage(self) -> None:
         try:
             print(f"{Fore.GREEN}Commands:{Style.RESET_ALL}")
-            max_cmd_len = max(len(cmd_name) for cmd_name in self.commands.keys())
-            for cmd_name, cmd in self.commands.items():
-                print(
-                    f"  {Fore.BLUE}{cmd_name.ljust(max_cmd_len)}{Style.RESET_ALL}  {cmd.desc}"
-                )
+            width = max(map(len, self.commands))
+            fmt, get = _USAGE_FMT.format, self.get
+            for cmd_name in self.commands:
+                print(fmt(name=cmd_name, width=width, desc=get(cmd_name).desc))
         except Exception:
             pass
 
     def available_commands(self) -> str:
-        avail_commands = [
-            f"{Fore.YELLOW}{c}{Style.RESET_ALL}" for c in self.commands.keys()
-        ]
-        return f"Available commands: [{', '.join(avail_commands)}]"
+        avail_commands = ", ".join(map(_NAME_FMT.format, self.commands))
+        return f"Available commands: [{avail_commands}]"
 
 
-@dataclass
+@dataclass(slots=True)
 class CommandObj(Command):
     cmd: "Command | CommandRegistry" = field(default_factory=Command)
     cwd: Path | None = None
@@ -80,29 +102,36 @@ class CommandObj(Command):
     throw: bool | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ExecCtx:
-    args: list[str]
+    args: deque[str]
     throw: bool = False
     cwd: Path | None = None
+    start_cwd: Path | None = None
 
-    def get_command(self, reg: CommandRegistry) -> Command:
-        if len(self.args) == 0:
-            print(f"{Fore.RED}Missing command(s)")
-            print(reg.available_commands())
-            exit(1)
-        cmd_name = self.args.pop(0)
-        if cmd_name not in reg.commands:
-            print(f"{Fore.RED}Unknown command: {cmd_name}")
-            print(reg.available_commands())
-            exit(1)
-        next_cmd = reg.commands[cmd_name]
-        if isinstance(next_cmd, CommandRegistry):
-            return self.get_command(next_cmd)
-        return next_cmd
-
+    def __post_init__(self) -> None:
+        # Callers may pass the args as a plain list.
+        if type(self.args) is not deque:
+            self.args = deque(self.args)
 
-@dataclass
+    def get_command(self, reg: CommandRegistry) -> Command:
+        while True:
+            if len(self.args) == 0:
+                print(f"{Fore.RED}Missing command(s)")
+                print(reg.available_commands())
+                exit(1)
+            cmd_name = self.args.popleft()
+            if cmd_name not in reg.commands:
+                print(f"{Fore.RED}Unknown command: {cmd_name}")
+                print(reg.available_commands())
+                exit(1)
+            next_cmd = reg.get(cmd_name)
+            if not isinstance(next_cmd, CommandRegistry):
+                return next_cmd
+            reg = next_cmd
+
+
+@dataclass(slots=True)
 class RunConfig:
     reg: CommandRegistry = field(default_factory=CommandRegistry)
 
@@ -113,7 +142,8 @@ class RunConfig:
 
     def execute(self, args: list[str]) -> None:
         try:
-            ctx = ExecCtx(args=args, cwd=Path.cwd())
+            cwd = Path.cwd()
+            ctx = ExecCtx(args=deque(args), cwd=cwd, start_cwd=cwd)
             cmd = ctx.get_command(self.reg)
             RunConfig.execute_command(cmd, ctx)
         except Exception:
@@ -124,53 +154,91 @@ class RunConfig:
     # in the finally block, it's a complete mess.
     @staticmethod
     def execute_command(cmd: Command, ctx: ExecCtx) -> None:
-        cwd: Path | None
-
-        if isinstance(cmd, ConfigCmd):
-            if isinstance(cmd, ThrowConfig):
-                ctx.throw = cmd.throw
-            elif isinstance(cmd, DescConfig):
-                pass
-            elif isinstance(cmd, CwdConfig):
-                ctx.cwd = cmd.cwd
-
-        elif isinstance(cmd, SimpleCommand):
-            sh.cmd(cmd.string, throw=ctx.throw)
-
-        elif isinstance(cmd, ListCommands):
-            throw = ctx.throw
-            cwd = ctx.cwd
-            try:
-                for sub_cmd in cmd.commands:
-                    RunConfig.execute_command(sub_cmd, ctx)
-            finally:
-                ctx.throw = throw
-                ctx.cwd = cwd
-
-        elif isinstance(cmd, CommandObj):
-            for key, value in cmd.set_env.items():
-                sh.set_env(key, value)
-            for env_var_name in cmd.ensure_env:
-                if not sh.has_env(env_var_name):
-                    print(f"{Fore.RED}Missing environment variable: {env_var_name}")
-                    print(f'While executing command: "{cmd}"')
-                    exit(1)
-            throw = ctx.throw
-            cwd = ctx.cwd
-            ctx.throw = cmd.throw if cmd.throw is not None else ctx.throw
-            ctx.cwd = cmd.cwd if cmd.cwd is not None else ctx.cwd
-            # ------------------------------------------
-            try:
-                if ctx.cwd is not None:
-                    sh.cd(ctx.cwd)
-                if isinstance(cmd.cmd, Command):
-                    RunConfig.execute_command(cmd.cmd, ctx)
-                elif isinstance(cmd.cmd, CommandRegistry):
-                    sub_cmd = ctx.get_command(cmd.cmd)
-                    RunConfig.execute_command(sub_cmd, ctx)
-            # ------------------------------------------
-            finally:
-                ctx.throw = throw
-                ctx.cwd = cwd
-            for key in cmd.set_env.keys():
-                sh.unset_env(key)
+        handler = _HANDLERS.get(type(cmd))
+        if handler is None:
+            handler = _find_handler(type(cmd))
+        handler(cmd, ctx)
+
+
+# -----------------------------------------------------------------------------
+# Command execution handlers
+# -----------------------------------------------------------------------------
+
+
+def _exec_noop(cmd: Command, ctx: ExecCtx) -> None:
+    pass
+
+
+def _exec_throw(cmd: ThrowConfig, ctx: ExecCtx) -> None:
+    ctx.throw = cmd.throw
+
+
+def _exec_cwd(cmd: CwdConfig, ctx: ExecCtx) -> None:
+    ctx.cwd = cmd.cwd if cmd.cwd is not None else ctx.start_cwd
+
+
+def _exec_simple(cmd: SimpleCommand, ctx: ExecCtx) -> None:
+    sh.cmd(cmd.string, throw=ctx.throw)
+
+
+def _exec_list(cmd: ListCommands, ctx: ExecCtx) -> None:
+    throw = ctx.throw
+    cwd = ctx.cwd
+    try:
+        for sub_cmd in cmd.commands:
+            RunConfig.execute_command(sub_cmd, ctx)
+    finally:
+        ctx.throw = throw
+        ctx.cwd = cwd
+
+
+def _exec_obj(cmd: CommandObj, ctx: ExecCtx) -> None:
+    old_env = sh.set_envs(cmd.set_env)
+    throw = ctx.throw
+    cwd = ctx.cwd
+    ctx.throw = cmd.throw if cmd.throw is not None else ctx.throw
+    ctx.cwd = cmd.cwd if cmd.cwd is not None else ctx.cwd
+    # ------------------------------------------
+    try:
+        missing_env = sh.missing_envs(cmd.ensure_env)
+        if missing_env:
+            print(
+                f"{Fore.RED}Missing environment variable: {', '.join(sorted(missing_env))}"
+            )
+            print(f'While executing command: "{cmd}"')
+            exit(1)
+        if ctx.cwd is not None:
+            sh.cd(ctx.cwd)
+        if isinstance(cmd.cmd, Command):
+            RunConfig.execute_command(cmd.cmd, ctx)
+        elif isinstance(cmd.cmd, CommandRegistry):
+            sub_cmd = ctx.get_command(cmd.cmd)
+            RunConfig.execute_command(sub_cmd, ctx)
+    # ------------------------------------------
+    finally:
+        ctx.throw = throw
+        ctx.cwd = cwd
+        sh.restore_envs(old_env)
+
+
+# Handlers keyed by the exact command type, so executing a command is a single
+# dict lookup instead of an isinstance chain.
+_HANDLERS: dict[type, Callable[[Any, ExecCtx], None]] = {
+    Command: _exec_noop,
+    ConfigCmd: _exec_noop,
+    ThrowConfig: _exec_throw,
+    DescConfig: _exec_noop,
+    CwdConfig: _exec_cwd,
+    SimpleCommand: _exec_simple,
+    ListCommands: _exec_list,
+    CommandObj: _exec_obj,
+}
+
+
+def _find_handler(cmd_type: type) -> Callable[[Any, ExecCtx], None]:
+    """Find the handler of an unregistered subclass from its MRO and cache it."""
+    for base in cmd_type.__mro__:
+        if base in _HANDLERS:
+            handler = _HANDLERS[cmd_type] = _HANDLERS[base]
+            return handler
+    raise TypeError(f"Cannot execute a {cmd_type.__name__}")
@@ -1,11 +1,37 @@
+import os
+from collections import deque
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, cast
 from unittest import TestCase
+from unittest.mock import patch
 
 from pyshrun import project_root, sh
+from pyshrun.parser import ConfigParser
+from pyshrun.types import (
+    CommandObj,
+    CommandRegistry,
+    ExecCtx,
+    LazyCommand,
+    RunConfig,
+    SimpleCommand,
+)
 
 
 class TestPsh(TestCase):
 
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.config_path = Path(tmp.name) / "run.yml"
+        self.cache_dir = Path(tmp.name) / "cache"
+
+    def _write_config(self, text: str) -> None:
+        self.config_path.write_text(text)
+
+    def _parse(self) -> RunConfig:
+        return ConfigParser(self.config_path, cache_dir=self.cache_dir).parse()
+
     def test_project_root(self) -> None:
         PROJECT_ROOT = project_root("tests")
         test_dir = Path(__file__).parent
@@ -28,3 +54,76 @@ class TestPsh(TestCase):
             self.assertEqual(output, "Building project...")
         except Exception as e:
             self.fail(f"Command execution failed with error: {e}")
+
+    def test_config_cache(self) -> None:
+        self._write_config("commands:\n  build: echo build\n")
+        config = self._parse()
+        self.assertEqual(len(list(self.cache_dir.glob("data-*.json"))), 1)
+
+        # A cache hit must not read the YAML file again.
+        with patch.object(ConfigParser, "_load_yaml", side_effect=AssertionError):
+            cached = self._parse()
+        self.assertEqual(cached, config)
+
+    def test_config_sidecar_stat(self) -> None:
+        self._write_config("commands:\n  build: echo build\n")
+        self._parse()
+        stat = self.config_path.stat()
+
+        # Same size, different mtime.
+        self._write_config("commands:\n  build: echo bxild\n")
+        os.utime(self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        config = self._parse()
+        self.assertEqual(config.reg.get("build"), SimpleCommand(string="echo bxild"))
+
+        # Same mtime, different size.
+        self._write_config("commands:\n  build: echo rebuild\n")
+        os.utime(self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        config = self._parse()
+        self.assertEqual(config.reg.get("build"), SimpleCommand(string="echo rebuild"))
+
+    def test_config_sidecar_not_json(self) -> None:
+        # Dates and non string keys don't round trip through JSON, so no
+        # sidecar should be written for them.
+        for extra in ["released: 2025-01-01", "ports: {8080: web}"]:
+            with self.subTest(extra=extra):
+                self._write_config(f"{extra}\ncommands:\n  a: echo a\n")
+                config = self._parse()
+                self.assertEqual(config.reg.get("a"), SimpleCommand(string="echo a"))
+                self.assertEqual(list(self.cache_dir.glob("data-*.json")), [])
+
+    def test_lazy_commands(self) -> None:
+        # An invalid command shouldn't fail until it's used.
+        self._write_config("commands:\n  bad: 42\n  build: echo build\n")
+        config = ConfigParser(self.config_path).parse()
+        self.assertIsInstance(config.reg.commands["build"], LazyCommand)
+
+        cmd = config.reg.get("build")
+        self.assertEqual(cmd, SimpleCommand(string="echo build"))
+        self.assertIs(config.reg.commands["build"], cmd)
+
+    def test_set_env_restores_previous_value(self) -> None:
+        os.environ["PSH_TEST_OLD"] = "old"
+        os.environ.pop("PSH_TEST_NEW", None)
+        try:
+            cmd = CommandObj(
+                cmd=SimpleCommand(string="echo"),
+                set_env={"PSH_TEST_OLD": "new", "PSH_TEST_NEW": "new"},
+            )
+            seen_env: list[str | None] = []
+            with patch.object(
+                sh, "cmd", lambda *_, **__: seen_env.append(os.getenv("PSH_TEST_OLD"))
+            ):
+                RunConfig.execute_command(cmd, ExecCtx(args=deque()))
+            self.assertEqual(seen_env, ["new"])
+            self.assertEqual(os.environ.get("PSH_TEST_OLD"), "old")
+            self.assertNotIn("PSH_TEST_NEW", os.environ)
+        finally:
+            os.environ.pop("PSH_TEST_OLD", None)
+            os.environ.pop("PSH_TEST_NEW", None)
+
+    def test_exec_ctx_list_args(self) -> None:
+        reg = CommandRegistry(commands={"build": SimpleCommand(string="echo")})
+        # ExecCtx is typed with a deque, but plain lists are still accepted.
+        ctx = ExecCtx(args=cast(Any, ["build"]))
+        self.assertEqual(ctx.get_command(reg), SimpleCommand(string="echo"))